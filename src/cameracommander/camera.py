@@ -1,10 +1,30 @@
 # camera.py
 
 import gphoto2 as gp
+import math
 import os
 import time
 import sys
 
+FILE_ADDED_TIMEOUT = 30  # Seconds to wait for the camera to deliver a bulb exposure
+EVENT_POLL_MS = 1000  # Upper bound for a single blocking wait_for_event call
+
+# Widget types that hold a readable value which can be compared before writing
+VALUE_WIDGET_TYPES = [
+    gp.GP_WIDGET_TEXT,
+    gp.GP_WIDGET_RANGE,
+    gp.GP_WIDGET_TOGGLE,
+    gp.GP_WIDGET_RADIO,
+    gp.GP_WIDGET_MENU,
+]
+
+# Widget types whose values libgphoto2 handles as strings
+STRING_WIDGET_TYPES = [
+    gp.GP_WIDGET_TEXT,
+    gp.GP_WIDGET_RADIO,
+    gp.GP_WIDGET_MENU,
+]
+
 def init_camera():
     camera = gp.Camera()
     camera.init()
@@ -53,8 +73,10 @@ def list_all_camera_settings(camera):
     recurse_config(config)
     return settings
 
-def get_setting_valid_values(camera, setting_key):
-    config = camera.get_config()
+def get_setting_valid_values(camera, setting_key, config=None):
+    # Callers looking up several keys can pass one config tree to share it
+    if config is None:
+        config = camera.get_config()
     keys = setting_key.split('/')
     widget = config
     try:
@@ -73,26 +95,85 @@ def get_setting_valid_values(camera, setting_key):
         valid_values = [True, False]
     return valid_values
 
+def get_settings_valid_values(camera, setting_keys):
+    """Look up valid values for several setting keys from a single config fetch."""
+    config = camera.get_config()
+    return {key: get_setting_valid_values(camera, key, config) for key in setting_keys}
+
+def normalize_widget_value(widget_type, value):
+    """Convert a settings value to the type the widget expects, YAML may hold plain numbers."""
+    if widget_type in STRING_WIDGET_TYPES:
+        return str(value)
+    return value
+
+def widget_value_matches(widget, value):
+    """Check whether a widget already holds value, allowing for YAML vs camera types."""
+    widget_type = widget.get_type()
+    if widget_type not in VALUE_WIDGET_TYPES:
+        return False
+    current = widget.get_value()
+    value = normalize_widget_value(widget_type, value)
+    if widget_type == gp.GP_WIDGET_RANGE:
+        # libgphoto2 stores ranges as float32, so compare with a tolerance
+        try:
+            return math.isclose(float(current), float(value), rel_tol=1e-6)
+        except (TypeError, ValueError):
+            return False
+    return current == value
+
+def find_widget(config, key):
+    """Walk the config tree along a slash separated setting key."""
+    widget = config
+    for k in key.split('/'):
+        widget = widget.get_child_by_name(k)
+    return widget
+
+def commit_settings(camera, config, changed):
+    """Commit the (key, value) changes already set on config to the camera."""
+    if not changed:
+        return
+    # Commit all widget changes to the camera in a single round-trip
+    try:
+        camera.set_config(config)
+    except gp.GPhoto2Error:
+        # One rejected widget fails the whole commit, so fall back to
+        # committing key by key to apply the rest and name the failing key
+        for key, value in changed:
+            try:
+                # Fresh tree per key so a rejected value is not re-sent
+                config = camera.get_config()
+                find_widget(config, key).set_value(value)
+                camera.set_config(config)
+                print(f"Set {key} to {value}")
+            except gp.GPhoto2Error as e:
+                print(f"Failed to set {key} to {value}: {e}")
+        return
+    for key, value in changed:
+        print(f"Set {key} to {value}")
+
 def set_camera_settings(camera, settings):
     config = camera.get_config()
+    changed = []
     for key, value in settings.items():
         try:
-            keys = key.split('/')
-            widget = config
-            for k in keys:
-                widget = widget.get_child_by_name(k)
-            if widget.get_type() == gp.GP_WIDGET_MENU:
+            widget = find_widget(config, key)
+            widget_type = widget.get_type()
+            value = normalize_widget_value(widget_type, value)
+            if widget_value_matches(widget, value):
+                # Camera already holds this value, skip the redundant write
+                continue
+            if widget_type == gp.GP_WIDGET_MENU:
                 choices = [widget.get_choice(i) for i in range(widget.count_choices())]
                 if value not in choices:
                     print(f"Invalid value '{value}' for {key}. Available choices are: {choices}")
                     continue
             widget.set_value(value)
-            camera.set_config(config)
-            print(f"Set {key} to {value}")
+            changed.append((key, value))
         except gp.GPhoto2Error as e:
             print(f"Failed to set {key} to {value}: {e}")
         except Exception as e:
             print(f"Error setting {key}: {e}")
+    commit_settings(camera, config, changed)
 
 def validate_settings(camera, settings):
     config = camera.get_config()
@@ -102,7 +183,9 @@ def validate_settings(camera, settings):
             widget = config
             for k in keys:
                 widget = widget.get_child_by_name(k)
-            if widget.get_type() == gp.GP_WIDGET_MENU:
+            widget_type = widget.get_type()
+            value = normalize_widget_value(widget_type, value)
+            if widget_type == gp.GP_WIDGET_MENU:
                 choices = [widget.get_choice(i) for i in range(widget.count_choices())]
                 if value not in choices:
                     raise ValueError(f"Invalid value '{value}' for {key}. Available choices are: {choices}")
@@ -144,6 +227,22 @@ def countdown_timer(duration):
     sys.stdout.flush()
 
 
+def wait_for_file_added(camera, timeout):
+    """Wait up to timeout seconds for the camera to report a new file and return its path."""
+    deadline = time.monotonic() + timeout
+    while True:
+        # Wait only for the time left, so unrelated events do not extend the timeout
+        remaining_ms = int((deadline - time.monotonic()) * 1000)
+        if remaining_ms <= 0:
+            raise TimeoutError(f"Camera did not report a new image within {timeout} seconds")
+        # Short waits keep the loop responsive to Ctrl-C
+        event_type, event_data = camera.wait_for_event(min(remaining_ms, EVENT_POLL_MS))
+        # GP_EVENT_CAPTURE_COMPLETE does not shorten the wait, it is not known
+        # to arrive only after in-camera noise reduction has finished
+        if event_type == gp.GP_EVENT_FILE_ADDED:
+            return event_data
+
+
 def capture_image(camera, filename, long_exposure=None):
     if long_exposure is not None:
         # Set the camera to Bulb mode
@@ -151,17 +250,16 @@ def capture_image(camera, filename, long_exposure=None):
         # Start the exposure by setting eosremoterelease to 'Press Full'
         print(f"Starting long exposure for {long_exposure} seconds...")
         set_camera_settings(camera, {'eosremoterelease': 'Press Full'})
-        countdown_timer(long_exposure)
-        # End the exposure by setting eosremoterelease to 'Release Full'
-        print("Ending long exposure.")
-        set_camera_settings(camera, {'eosremoterelease': 'Release Full'})
-        # Wait for the camera to process the image
-        time.sleep(2)
-        # Retrieve the image
-        event_type, event_data = camera.wait_for_event(1000)
-        while event_type != gp.GP_EVENT_FILE_ADDED:
-            event_type, event_data = camera.wait_for_event(1000)
-        file_path = event_data
+        try:
+            countdown_timer(long_exposure)
+        finally:
+            # End the exposure by setting eosremoterelease to 'Release Full',
+            # also when interrupted so the shutter is never left pressed
+            print("Ending long exposure.")
+            set_camera_settings(camera, {'eosremoterelease': 'Release Full'})
+        # Wait for the camera to process and report the image; in-camera
+        # long exposure noise reduction can take as long as the exposure
+        file_path = wait_for_file_added(camera, long_exposure + FILE_ADDED_TIMEOUT)
     else:
         # Regular capture
         file_path = camera.capture(gp.GP_CAPTURE_IMAGE)
@@ -186,12 +284,23 @@ def start_timelapse(camera, script_settings):
         print(f"Created target directory: {target_path}")
     if duration is not None:
         duration_seconds = duration * 3600  # Convert hours to seconds
-        total_time = 0
     # Time-lapse capture
     print("Starting time-lapse capture...")
+    # Frames are scheduled on a fixed monotonic grid so capture and
+    # battery-read time does not add drift to the interval
+    start_time = next_frame_time = time.monotonic()
     for i in range(frames):
-        start_time = time.time()
-        if duration is not None and total_time >= duration_seconds:
+        if i > 0:
+            delay = next_frame_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                print(f"Warning: Image capture took longer than the interval.")
+                # Resync instead of firing the backlog of late frames
+                next_frame_time = time.monotonic()
+        next_frame_time += interval
+        # Compare against actual elapsed time, which includes any overruns
+        if duration is not None and time.monotonic() - start_time >= duration_seconds:
             print("Reached duration limit.")
             break
         # Create unique filename
@@ -202,15 +311,6 @@ def start_timelapse(camera, script_settings):
         except Exception as e:
             print(f"Failed to capture image: {e}")
             continue
-        if i < frames - 1:
-            # Wait for the interval - time taken to capture the image
-            elapsed_time = time.time() - start_time
-            if elapsed_time < interval:
-                time.sleep(interval - elapsed_time)
-            else:
-                print(f"Warning: Image capture took longer than the interval.")
-            if duration is not None:
-                total_time += interval
         if i % 5 == 0:
             battery_level = get_battery_level(camera)
             print(f"Battery Level: {battery_level}")
@@ -218,17 +318,19 @@ def start_timelapse(camera, script_settings):
 
 def set_camera_settings_to_auto(camera):
     config = camera.get_config()
-    def recurse_and_set_auto(widget):
+    changed = []
+    def recurse_and_set_auto(widget, path=''):
         for child in widget.get_children():
+            child_path = f"{path}/{child.get_name()}" if path else child.get_name()
             widget_type = child.get_type()
             if widget_type in [gp.GP_WIDGET_MENU, gp.GP_WIDGET_RADIO]:
                 choices = [child.get_choice(i) for i in range(child.count_choices())]
-                if 'Auto' in choices:
+                if 'Auto' in choices and not widget_value_matches(child, 'Auto'):
                     child.set_value('Auto')
-                    camera.set_config(config)
-                    print(f"Set {child.get_name()} to Auto")
-            recurse_and_set_auto(child)
+                    changed.append((child_path, 'Auto'))
+            recurse_and_set_auto(child, child_path)
     recurse_and_set_auto(config)
+    commit_settings(camera, config, changed)
 
 def get_current_camera_settings(camera):
     settings = {}
@@ -248,8 +350,8 @@ def get_current_camera_settings(camera):
     return settings
 
 def get_battery_level(camera):
-    config = camera.get_config()
-    battery_widget = config.get_child_by_name('batterylevel')
+    # Fetch just this widget rather than the whole config tree
+    battery_widget = camera.get_single_config('batterylevel')
     battery_level = battery_widget.get_value()
     return battery_level
 
@@ -2,7 +2,7 @@ import click
 from .settings import load_settings, save_settings
 from .camera import (
     list_all_camera_settings,
-    get_setting_valid_values,
+    get_settings_valid_values,
     capture_image,
     set_camera_settings,
     start_timelapse,
@@ -52,8 +52,8 @@ def list_available_values(settings_file):
         settings = load_settings(settings_file)
         camera_settings = settings.get('camera_settings', {})
         camera = init_camera()
-        for key in camera_settings.keys():
-            valid_values = get_setting_valid_values(camera, key)
+        all_valid_values = get_settings_valid_values(camera, camera_settings.keys())
+        for key, valid_values in all_valid_values.items():
             if valid_values is not None:
                 click.echo(f"\nSetting '{key}' valid values:")
                 if isinstance(valid_values, list):
@@ -76,9 +76,7 @@ def snapshot(settings_file, long_exposure):
     try:
         settings = load_settings(settings_file)
         camera_settings = settings.get('camera_settings', {})
-        from camera import get_battery_level
         camera = init_camera()
-        get_battery_level(camera)
         set_camera_settings(camera, camera_settings)
         capture_image(camera, 'snapshot.jpg', long_exposure=long_exposure)
         exit_camera(camera)
@@ -1,11 +1,17 @@
 import yaml
 
+# Prefer the libyaml-backed loader/dumper, fall back to pure Python without libyaml
+try:
+    from yaml import CSafeLoader as _Loader, CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _Loader, SafeDumper as _Dumper
+
 def load_settings(settings_file):
     with open(settings_file, 'r') as f:
-        settings = yaml.safe_load(f)
+        settings = yaml.load(f, Loader=_Loader)
     return settings
 
 def save_settings(settings_dict, settings_file):
     with open(settings_file, 'w') as f:
-        yaml.safe_dump(settings_dict, f)
+        yaml.dump(settings_dict, f, Dumper=_Dumper)
 